@@ -1,6 +1,6 @@
 """Session compaction - reduce context by shrinking old tool uses.
 
-This module modifies session JSONL files in-place. We shrink old, large
+This module rewrites session JSONL files in place. We shrink old, large
 tool_use inputs and tool_result outputs while preserving the message structure
 needed for Claude Code's renderer.
 
@@ -9,9 +9,14 @@ what Claude sees.
 """
 
 import json
+import os
 import shutil
+import tempfile
 from collections import defaultdict
 from pathlib import Path
+from typing import NamedTuple
+
+import orjson
 
 from claudechic.enums import ToolName
 from claudechic.sessions import get_project_sessions_dir
@@ -27,6 +32,51 @@ READ_WHITELIST = [
 ]
 
 
+# Buffer size for writing the compacted session (one syscall per MiB, not per line)
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+class _ToolUse(NamedTuple):
+    """What compaction needs to remember about a tool_use block."""
+
+    name: str
+    input_size: int  # bytes of JSON-encoded input
+    msg_idx: int
+
+
+# Stand-in for tool_results whose tool_use isn't in the session
+_UNKNOWN_TOOL_USE = _ToolUse("unknown", 0, -1)
+
+
+def _load_message(line: bytes) -> dict:
+    """Parse one session line, falling back to the stdlib for what orjson rejects.
+
+    Node writes lone surrogate escapes when tool output is cut mid-emoji, and
+    orjson also refuses NaN/Infinity; json.loads accepts all of them.
+    """
+    try:
+        return orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return json.loads(line)
+
+
+def _json_size(value) -> int:
+    """Length of value serialized as compact JSON."""
+    try:
+        return len(orjson.dumps(value))
+    except orjson.JSONEncodeError:  # Lone surrogates from a stdlib-parsed line
+        return len(json.dumps(value, separators=(",", ":")))
+
+
+def _dump_message(message: dict) -> bytes:
+    """Serialize a rebuilt message as one JSONL line.
+
+    The stdlib keeps everything json.loads accepted; these are only the few
+    messages that were compacted.
+    """
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
 def _is_whitelisted_read(file_path: str) -> bool:
     """Check if a file's basename matches the read whitelist."""
     return Path(file_path).name in READ_WHITELIST
@@ -34,7 +84,7 @@ def _is_whitelisted_read(file_path: str) -> bool:
 
 # Compacted output strings for each tool type.
 # These are minimal strings that won't crash Claude Code's renderer.
-COMPACTED_RESULTS = {
+COMPACTED_RESULTS: dict[str, str] = {
     # Most tools just use plain text - a simple message works
     ToolName.BASH: "[output compacted]",
     ToolName.READ: "[file content compacted]",
@@ -51,6 +101,55 @@ COMPACTED_RESULTS = {
 }
 
 
+def _backup_session(session_file: Path, backup_file: Path) -> None:
+    """Preserve the current session file as backup_file.
+
+    Hard links when possible (safe because the session file is about to be
+    replaced by a new inode), otherwise copies. The result is staged under a
+    temp name and swapped in, so an existing backup survives a failed attempt.
+    """
+    tmp_backup = backup_file.with_name(f".{backup_file.name}.tmp")
+    tmp_backup.unlink(missing_ok=True)
+    try:
+        try:
+            os.link(session_file, tmp_backup)
+        except OSError:
+            shutil.copyfile(session_file, tmp_backup)  # No hard link support
+        os.replace(tmp_backup, backup_file)
+    except BaseException:
+        tmp_backup.unlink(missing_ok=True)
+        raise
+
+
+def _compaction_stats(
+    session_file: Path,
+    before_chars: dict[str, int],
+    after_chars: dict[str, int],
+    compacted_inputs: int,
+    compacted_results: int,
+) -> dict:
+    """Build the stats dict returned by compact_session.
+
+    Breakdowns come in as character counts; tokens are estimated at ~4 chars each.
+    """
+    before_breakdown = {k: v >> 2 for k, v in before_chars.items()}
+    after_breakdown = {k: v >> 2 for k, v in after_chars.items()}
+
+    before_total = sum(before_breakdown.values())
+    after_total = sum(after_breakdown.values())
+
+    return {
+        "compacted_inputs": compacted_inputs,
+        "compacted_results": compacted_results,
+        "tokens_saved": before_total - after_total,
+        "before_total": before_total,
+        "after_total": after_total,
+        "before_breakdown": before_breakdown,
+        "after_breakdown": after_breakdown,
+        "file": str(session_file),
+    }
+
+
 def compact_session(
     session_id: str,
     cwd: Path | None = None,
@@ -59,6 +158,7 @@ def compact_session(
     min_input_size: int = 2000,  # Only shrink inputs larger than this (bytes)
     aggressive: bool = False,  # If True, use lower thresholds (500/1000)
     dry_run: bool = False,
+    backup: bool = True,  # Keep the original as <session>.jsonl.bak
 ) -> dict:
     """Compact a session by shrinking old, large tool_use/tool_result pairs.
 
@@ -82,36 +182,48 @@ def compact_session(
     if not session_file.exists():
         return {"error": f"Session file not found: {session_file}"}
 
-    # Load all messages
+    # Load all messages (orjson parses raw bytes, no text-mode decode).
+    # Raw lines are kept so untouched messages are written back byte for byte.
     messages = []
-    with open(session_file, encoding="utf-8") as f:
+    raw_lines = []
+    with open(session_file, "rb") as f:
         for line in f:
             if line.strip():
-                messages.append(json.loads(line))
+                messages.append(_load_message(line))
+                raw_lines.append(line if line.endswith(b"\n") else line + b"\n")
 
-    # First pass: collect tool_use info and track order
-    tool_uses: dict = {}  # tool_id -> {name, input, input_size, msg_idx}
+    # Single pass: collect tool_use/tool_result info and the "before" breakdown
+    tool_uses: dict[str, _ToolUse] = {}  # tool_id -> _ToolUse
     tool_order: list = []  # tool_ids in order
+    tool_results: dict = {}  # tool_id -> result_size
+    before = {  # category -> chars
+        "assistant_text": 0,
+        "tool_inputs": 0,
+        "user_text": 0,
+        "tool_results": 0,
+    }
 
     # Track file operations for Read compaction heuristics
     file_reads: dict[str, list[str]] = defaultdict(list)  # file_path -> [tool_ids]
     file_writes: dict[str, list[str]] = defaultdict(list)
 
     for msg_idx, m in enumerate(messages):
-        if m.get("type") == "assistant":
+        msg_type = m.get("type")
+        if msg_type == "assistant":
             for block in m.get("message", {}).get("content", []):
-                if isinstance(block, dict) and block.get("type") == "tool_use":
+                if type(block) is not dict:
+                    continue
+                block_type = block.get("type")
+                if block_type == "text":
+                    before["assistant_text"] += len(block.get("text", ""))
+                elif block_type == "tool_use":
                     tool_id = block["id"]
                     inp = block.get("input", {})
-                    input_size = len(json.dumps(inp))
-                    tool_name = block.get("name")
-                    tool_uses[tool_id] = {
-                        "name": tool_name,
-                        "input": inp,
-                        "input_size": input_size,
-                        "msg_idx": msg_idx,
-                    }
+                    input_size = _json_size(inp)
+                    tool_name = block.get("name", "unknown")
+                    tool_uses[tool_id] = _ToolUse(tool_name, input_size, msg_idx)
                     tool_order.append(tool_id)
+                    before["tool_inputs"] += input_size
 
                     # Track file operations
                     file_path = inp.get("file_path")
@@ -121,18 +233,21 @@ def compact_session(
                         elif tool_name in (ToolName.WRITE, ToolName.EDIT):
                             file_writes[file_path].append(tool_id)
 
-    # Second pass: collect tool_result info
-    # tool_id -> result_size
-    tool_results: dict = {}
-    for m in messages:
-        if m.get("type") == "user":
+        elif msg_type == "user":
             content = m.get("message", {}).get("content", [])
-            if isinstance(content, list):
+            if type(content) is str:
+                before["user_text"] += len(content)
+            elif type(content) is list:
                 for block in content:
-                    if isinstance(block, dict) and block.get("type") == "tool_result":
-                        tool_id = block.get("tool_use_id")
-                        result_content = block.get("content", "")
-                        tool_results[tool_id] = len(str(result_content))
+                    if type(block) is not dict:
+                        continue
+                    block_type = block.get("type")
+                    if block_type == "tool_result":
+                        result_size = len(str(block.get("content", "")))
+                        tool_results[block.get("tool_use_id")] = result_size
+                        before["tool_results"] += result_size
+                    elif block_type == "text":
+                        before["user_text"] += len(block.get("text", ""))
 
     # Decide what to truncate based on size AND recency
     # Keep last N of each tool type
@@ -140,8 +255,7 @@ def compact_session(
     recent_tools: set = set()
 
     for tool_id in reversed(tool_order):
-        info = tool_uses.get(tool_id, {})
-        name = info.get("name", "unknown")
+        name = tool_uses[tool_id].name
         if tool_counts[name] < keep_last_n:
             recent_tools.add(tool_id)
             tool_counts[name] += 1
@@ -151,7 +265,7 @@ def compact_session(
     for tool_id, info in tool_uses.items():
         if tool_id in recent_tools:
             continue  # Keep recent
-        if info["input_size"] < min_input_size:
+        if info.input_size < min_input_size:
             continue  # Keep small
         compact_input_ids.add(tool_id)
 
@@ -179,166 +293,147 @@ def compact_session(
                 continue
 
             # Check if there's any write to this file after this read
-            read_msg_idx = tool_uses[read_id]["msg_idx"]
+            read_msg_idx = tool_uses[read_id].msg_idx
             has_later_write = any(
-                tool_uses[wid]["msg_idx"] > read_msg_idx for wid in write_ids
+                tool_uses[wid].msg_idx > read_msg_idx for wid in write_ids
             )
 
             # Preserve if no write follows (this read provides unique context)
             if not has_later_write:
                 compact_result_ids.discard(read_id)
 
-    # Create compacted messages
-    compacted_messages = []
+    # Nothing crosses the thresholds, so the output would equal the input:
+    # skip the rewrite and leave the file (and any previous backup) alone
+    if not compact_input_ids and not compact_result_ids:
+        stats = _compaction_stats(session_file, before, before, 0, 0)
+        if dry_run:
+            stats["dry_run"] = True
+        return stats
 
-    for m in messages:
+    # Blocks are plain dicts straight from the parser, so exact type checks suffice
+    def shrinks_input(block) -> bool:
+        return (
+            type(block) is dict
+            and block.get("type") == "tool_use"
+            and block.get("id") in compact_input_ids
+        )
+
+    def shrinks_result(block) -> bool:
+        return (
+            type(block) is dict
+            and block.get("type") == "tool_result"
+            and block.get("tool_use_id") in compact_result_ids
+        )
+
+    # Create compacted lines. Only messages holding a block to shrink are
+    # rebuilt; everything else keeps its original bytes. Rebuilt messages are
+    # re-parsed with the stdlib so values orjson can't round-trip (integers
+    # wider than 64 bits, NaN, lone surrogates) survive unchanged.
+    # The "after" breakdown starts from "before" and subtracts what each
+    # compacted block saves, so nothing is re-walked.
+    compacted_lines = []
+    after = before.copy()
+
+    for m, raw in zip(messages, raw_lines):
         msg_type = m.get("type")
 
         # Handle assistant messages - shrink tool_use inputs
         if msg_type == "assistant":
             content = m.get("message", {}).get("content", [])
-            if not isinstance(content, list):
-                compacted_messages.append(m)
+            if type(content) is not list or not any(map(shrinks_input, content)):
+                compacted_lines.append(raw)
                 continue
 
+            m = json.loads(raw)
             new_content = []
-            modified = False
-            for block in content:
-                if isinstance(block, dict) and block.get("type") == "tool_use":
-                    tool_id = block.get("id")
-                    if tool_id in compact_input_ids:
-                        # Shrink the input but keep the tool_use block
-                        info = tool_uses[tool_id]
-                        new_block = {
-                            **block,
-                            "input": {
-                                "_compacted": True,
-                                "_original_size": info["input_size"],
-                            },
-                        }
-                        new_content.append(new_block)
-                        modified = True
-                    else:
-                        new_content.append(block)
+            for block in m["message"]["content"]:
+                if shrinks_input(block):
+                    # Shrink the input but keep the tool_use block
+                    info = tool_uses[block["id"]]
+                    new_input = {
+                        "_compacted": True,
+                        "_original_size": info.input_size,
+                    }
+                    after["tool_inputs"] -= info.input_size - _json_size(new_input)
+                    new_content.append({**block, "input": new_input})
                 else:
                     new_content.append(block)
 
-            if modified:
-                new_msg = {**m, "message": {**m["message"], "content": new_content}}
-                compacted_messages.append(new_msg)
-            else:
-                compacted_messages.append(m)
+            new_msg = {**m, "message": {**m["message"], "content": new_content}}
+            compacted_lines.append(_dump_message(new_msg))
 
         # Handle user messages - shrink tool_result outputs
         elif msg_type == "user":
             content = m.get("message", {}).get("content", [])
-            if not isinstance(content, list):
-                compacted_messages.append(m)
+            if type(content) is not list or not any(map(shrinks_result, content)):
+                compacted_lines.append(raw)
                 continue
 
+            m = json.loads(raw)
             new_content = []
-            modified = False
-            for block in content:
-                if isinstance(block, dict) and block.get("type") == "tool_result":
-                    tool_id = block.get("tool_use_id")
-                    if tool_id in compact_result_ids:
-                        # Get the tool name to use the right compacted output
-                        tool_name = tool_uses.get(tool_id, {}).get("name", "unknown")
-                        compacted_output = COMPACTED_RESULTS.get(
-                            tool_name, "[compacted]"
-                        )
-                        new_block = {
+            for block in m["message"]["content"]:
+                if shrinks_result(block):
+                    # Get the tool name to use the right compacted output
+                    tool_id = block["tool_use_id"]
+                    tool_name = tool_uses.get(tool_id, _UNKNOWN_TOOL_USE).name
+                    compacted_output = COMPACTED_RESULTS.get(tool_name, "[compacted]")
+                    after["tool_results"] -= tool_results[tool_id] - len(
+                        compacted_output
+                    )
+                    new_content.append(
+                        {
                             "type": "tool_result",
                             "tool_use_id": tool_id,
                             "content": compacted_output,
                         }
-                        new_content.append(new_block)
-                        modified = True
-                    else:
-                        new_content.append(block)
+                    )
                 else:
                     new_content.append(block)
 
-            if modified:
-                new_msg = {**m, "message": {**m["message"], "content": new_content}}
-                # Also update toolUseResult if present
-                if "toolUseResult" in new_msg and len(new_content) == 1:
-                    tool_id = new_content[0].get("tool_use_id")
-                    if tool_id in compact_result_ids:
-                        tool_name = tool_uses.get(tool_id, {}).get("name", "unknown")
-                        new_msg["toolUseResult"] = COMPACTED_RESULTS.get(
-                            tool_name, "[compacted]"
-                        )
-                compacted_messages.append(new_msg)
-            else:
-                compacted_messages.append(m)
+            new_msg = {**m, "message": {**m["message"], "content": new_content}}
+            # Also update toolUseResult if present
+            if "toolUseResult" in new_msg and len(new_content) == 1:
+                tool_id = new_content[0].get("tool_use_id")
+                if tool_id in compact_result_ids:
+                    tool_name = tool_uses.get(tool_id, _UNKNOWN_TOOL_USE).name
+                    new_msg["toolUseResult"] = COMPACTED_RESULTS.get(
+                        tool_name, "[compacted]"
+                    )
+            compacted_lines.append(_dump_message(new_msg))
 
         else:
-            compacted_messages.append(m)
-
-    # Calculate before/after token breakdown by category
-    def calc_tokens(msgs: list) -> dict[str, int]:
-        """Calculate token breakdown for a message list."""
-        breakdown: dict[str, float] = defaultdict(float)
-        for m in msgs:
-            t = m.get("type")
-            if t == "assistant":
-                for block in m.get("message", {}).get("content", []):
-                    if isinstance(block, dict):
-                        if block.get("type") == "text":
-                            breakdown["assistant_text"] += (
-                                len(block.get("text", "")) / 4
-                            )
-                        elif block.get("type") == "tool_use":
-                            breakdown["tool_inputs"] += (
-                                len(json.dumps(block.get("input", {}))) / 4
-                            )
-            elif t == "user":
-                content = m.get("message", {}).get("content", [])
-                if isinstance(content, str):
-                    breakdown["user_text"] += len(content) / 4
-                elif isinstance(content, list):
-                    for block in content:
-                        if isinstance(block, dict):
-                            if block.get("type") == "tool_result":
-                                breakdown["tool_results"] += (
-                                    len(str(block.get("content", ""))) / 4
-                                )
-                            elif block.get("type") == "text":
-                                breakdown["user_text"] += len(block.get("text", "")) / 4
-        return {k: int(v) for k, v in breakdown.items()}
-
-    before_breakdown = calc_tokens(messages)
-    after_breakdown = calc_tokens(compacted_messages)
+            compacted_lines.append(raw)
 
-    before_total = sum(before_breakdown.values())
-    after_total = sum(after_breakdown.values())
-    tokens_saved = before_total - after_total
-
-    stats = {
-        "compacted_inputs": len(compact_input_ids),
-        "compacted_results": len(compact_result_ids),
-        "tokens_saved": tokens_saved,
-        "before_total": before_total,
-        "after_total": after_total,
-        "before_breakdown": before_breakdown,
-        "after_breakdown": after_breakdown,
-        "file": str(session_file),
-    }
+    stats = _compaction_stats(
+        session_file, before, after, len(compact_input_ids), len(compact_result_ids)
+    )
 
     if dry_run:
         stats["dry_run"] = True
         return stats
 
-    # Write compacted file
+    # Write to a temp file in the same dir, then swap it in atomically
     backup_file = session_file.with_suffix(".jsonl.bak")
-    shutil.copy(session_file, backup_file)
-
-    with open(session_file, "w", encoding="utf-8") as f:
-        for m in compacted_messages:
-            f.write(json.dumps(m) + "\n")
-
-    stats["backup"] = str(backup_file)
+    tmp = tempfile.NamedTemporaryFile(
+        dir=session_file.parent,
+        prefix=f".{session_file.name}.",
+        suffix=".tmp",
+        delete=False,
+        buffering=WRITE_BUFFER_SIZE,
+    )
+    try:
+        with tmp:
+            tmp.writelines(compacted_lines)
+        shutil.copymode(session_file, tmp.name)
+        if backup:
+            _backup_session(session_file, backup_file)
+        os.replace(tmp.name, session_file)
+    except BaseException:
+        Path(tmp.name).unlink(missing_ok=True)
+        raise
+
+    if backup:
+        stats["backup"] = str(backup_file)
     return stats
 
 
@@ -30,6 +30,7 @@ from claudechic.features.worktree.git import (
     get_finish_prompt,
     is_git_repo,
     list_worktrees,
+    list_worktrees_async,
     remove_worktree,
     start_worktree,
 )
@@ -497,21 +498,19 @@ async def _run_cleanup_prompt(
     app.query_one("#input", ChatInput).focus()
 
 
-def _show_worktree_modal(app: "ChatApp") -> None:
-    """Show worktree selection modal."""
-    worktrees = [(str(wt.path), wt.branch) for wt in list_worktrees() if not wt.is_main]
-    prompt = WorktreePrompt(worktrees)
-    container = Center(prompt, id="worktree-modal")
-    app.mount(container)
-    _wait_for_worktree_selection(app, prompt, container)
-
-
 @work(group="worktree", exclusive=True, exit_on_error=False)
-async def _wait_for_worktree_selection(
-    app: "ChatApp", prompt: WorktreePrompt, container: Center
-) -> None:
-    """Wait for worktree modal selection and act on it."""
+async def _show_worktree_modal(app: "ChatApp") -> None:
+    """Show worktree selection modal and act on the selection."""
     try:
+        worktrees = [
+            (str(wt.path), wt.branch)
+            for wt in await list_worktrees_async()
+            if not wt.is_main
+        ]
+        prompt = WorktreePrompt(worktrees)
+        container = Center(prompt, id="worktree-modal")
+        await app.mount(container)
+
         result = await prompt.wait()
         container.remove()
         if result is None:
@@ -519,9 +518,8 @@ async def _wait_for_worktree_selection(
 
         action, value = result
         if action == "switch":
-            # value is the path; find the branch name from worktrees
-            worktrees = {str(wt.path): wt.branch for wt in list_worktrees()}
-            branch = worktrees.get(value, Path(value).name)
+            # value is the path; find the branch name from the listed worktrees
+            branch = dict(worktrees).get(value, Path(value).name)
             _switch_or_create_worktree(app, branch)
         elif action == "new":
             _switch_or_create_worktree(app, value)
@@ -1,8 +1,14 @@
 """Git worktree management for isolated feature work."""
 
+import asyncio
+import functools
+import os
+import re
 import subprocess
+from collections.abc import Iterable
 from dataclasses import dataclass, field
 from enum import Enum, auto
+from itertools import chain
 from pathlib import Path
 
 from claudechic.config import CONFIG
@@ -110,23 +116,77 @@ def is_git_repo() -> bool:
 
 def get_repo_name() -> str:
     """Get the current repository name."""
+    return _get_repo_paths()[0].name
+
+
+# Repo layout never changes for a given cwd, so each is resolved once per process
+_repo_paths_cache: dict[Path, tuple[Path, Path | None]] = {}
+
+
+def _get_repo_paths() -> tuple[Path, Path | None]:
+    """Get the current worktree root and the main worktree dir in one git call.
+
+    Returns (toplevel, main_dir). main_dir is None when the common git dir is
+    not a regular .git directory (bare repos, submodules). Cached per cwd.
+    """
+    cwd = Path.cwd()
+    cached = _repo_paths_cache.get(cwd)
+    if cached is not None:
+        return cached
+
     result = subprocess.run(
-        ["git", "rev-parse", "--show-toplevel"],
+        ["git", "rev-parse", "--show-toplevel", "--git-common-dir"],
         capture_output=True,
         text=True,
         check=True,
     )
-    return Path(result.stdout.strip()).name
+    toplevel, common_dir = result.stdout.splitlines()[:2]
+    # --git-common-dir may be relative to cwd (--path-format=absolute needs git 2.31)
+    common_path = Path(os.path.normpath(cwd / common_dir))
+    main_dir = common_path.parent if common_path.name == ".git" else None
+    paths = (Path(toplevel), main_dir)
+    _repo_paths_cache[cwd] = paths
+    return paths
+
 
+# The `git worktree list --porcelain` attributes we use; others are skipped
+_PORCELAIN_RE = re.compile(
+    rb"worktree (?P<path>.*)|branch refs/heads/(?P<branch>.*)|(?P<bare>bare)$"
+)
 
-def _is_main_worktree(worktree_path: Path) -> bool:
-    """Check if a worktree is the main one (not a linked worktree).
 
-    Main worktrees have .git as a directory; linked worktrees have .git as a file
-    pointing to the main repo's .git/worktrees/<name>.
+def _parse_worktree_porcelain(lines: Iterable[bytes]) -> list[WorktreeInfo]:
+    """Parse `git worktree list --porcelain` output, one raw line at a time.
+
+    Records are separated by blank lines. Git always lists the main worktree
+    first, so the first record is main unless the repo is bare. Entries without
+    a branch (detached HEAD, bare) are skipped.
     """
-    git_path = worktree_path / ".git"
-    return git_path.is_dir()
+    worktrees = []
+    first = True
+    current_path = None
+    current_branch = None
+    current_bare = False
+
+    # Trailing sentinel flushes the last record if output lacks a final blank line
+    for line in chain(lines, (b"",)):
+        if m := _PORCELAIN_RE.match(line):
+            if m["path"] is not None:
+                current_path = Path(os.fsdecode(m["path"]))
+            elif m["branch"] is not None:
+                current_branch = m["branch"].decode()
+            else:
+                current_bare = True
+        elif not line.strip() and current_path:
+            if current_branch:
+                is_main = first and not current_bare
+                worktrees.append(WorktreeInfo(current_path, current_branch, is_main))
+            first = False
+            current_path = None
+            current_branch = None
+            current_bare = False
+
+    return worktrees
 
 
 def list_worktrees() -> list[WorktreeInfo]:
@@ -134,40 +194,32 @@ def list_worktrees() -> list[WorktreeInfo]:
     result = subprocess.run(
         ["git", "worktree", "list", "--porcelain"],
         capture_output=True,
-        text=True,
         check=True,
     )
+    return _parse_worktree_porcelain(result.stdout.splitlines(keepends=True))
 
-    worktrees = []
-    current_path = None
-    current_branch = None
 
-    for line in result.stdout.strip().split("\n"):
-        if line.startswith("worktree "):
-            current_path = Path(line[9:])
-        elif line.startswith("branch refs/heads/"):
-            current_branch = line[18:]
-        elif line == "":
-            if current_path and current_branch:
-                is_main = _is_main_worktree(current_path)
-                worktrees.append(WorktreeInfo(current_path, current_branch, is_main))
-            current_path = None
-            current_branch = None
+async def list_worktrees_async() -> list[WorktreeInfo]:
+    """List all git worktrees without blocking the event loop."""
+    args = ["git", "worktree", "list", "--porcelain"]
+    proc = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await proc.communicate()
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, args, stderr=stderr)
+    return _parse_worktree_porcelain(stdout.splitlines(keepends=True))
 
-    # Handle last entry if no trailing newline
-    if current_path and current_branch:
-        is_main = _is_main_worktree(current_path)
-        worktrees.append(WorktreeInfo(current_path, current_branch, is_main))
 
-    return worktrees
+def _find_main(worktrees: list[WorktreeInfo]) -> tuple[Path, str] | None:
+    return next(((wt.path, wt.branch) for wt in worktrees if wt.is_main), None)
 
 
 def get_main_worktree() -> tuple[Path, str] | None:
     """Find the main worktree (non-feature) path and its branch."""
-    for wt in list_worktrees():
-        if wt.is_main:
-            return wt.path, wt.branch
-    return None
+    return _find_main(list_worktrees())
 
 
 def get_parent_branch(branch: str, cwd: Path | None = None) -> str | None:
@@ -214,6 +266,25 @@ def get_parent_branch(branch: str, cwd: Path | None = None) -> str | None:
     return best_branch
 
 
+# Worktree path template variables: ${repo_name}, ${branch_name} and $HOME
+_TEMPLATE_RE = re.compile(r"\$\{(repo_name|branch_name)\}|\$HOME")
+
+# Names substituted into path templates: not blank, no NUL, no ".." component.
+# Slashes are allowed since branch names like "feature/x" nest directories.
+_NAME_RE = re.compile(r"(?!\s*\Z)(?!(?:.*/)?\.\.(?:/|\Z))[^\x00]+", re.DOTALL)
+
+
+def _validate_name(name: str, label: str) -> None:
+    """Raise ValueError unless name is safe to substitute into a path."""
+    if _NAME_RE.fullmatch(name):
+        return
+    if not name.strip():
+        raise ValueError(f"{label} cannot be empty")
+    if "\x00" in name:
+        raise ValueError(f"{label} contains a null byte: {name!r}")
+    raise ValueError(f"{label} contains path traversal component: {name}")
+
+
 def _expand_worktree_path(template: str, repo_name: str, feature_name: str) -> Path:
     """Expand template variables in worktree path.
 
@@ -229,23 +300,34 @@ def _expand_worktree_path(template: str, repo_name: str, feature_name: str) -> P
         feature_name: Name of the feature/branch
 
     Returns:
-        Expanded Path object
+        Expanded absolute Path. It is normalized lexically (Path collapses
+        "." and repeated separators; ".." is rejected) without touching the
+        filesystem, so symlinks are kept as written, like sibling worktree paths.
 
     Raises:
         ValueError: If expanded path is not absolute or contains path traversal patterns
     """
-    if not repo_name or not repo_name.strip():
-        raise ValueError("Repository name cannot be empty")
-    if not feature_name or not feature_name.strip():
-        raise ValueError("Feature name cannot be empty")
-
-    expanded = (
-        template.replace("${repo_name}", repo_name)
-        .replace("${branch_name}", feature_name)
-        .replace("$HOME", str(Path.home()))
-    )
+    return _expand_template(template, repo_name, feature_name, str(Path.home()))
 
-    path = Path(expanded).expanduser()
+
+@functools.lru_cache(maxsize=256)
+def _expand_template(
+    template: str, repo_name: str, feature_name: str, home: str
+) -> Path:
+    """Implementation of _expand_worktree_path, cached per (template, names, home)."""
+    _validate_name(repo_name, "Repository name")
+    _validate_name(feature_name, "Feature name")
+
+    # One pass, so substituted names are never themselves expanded.
+    # Plain paths (no variables, no ~) skip substitution and expanduser.
+    expanded = template
+    if "$" in template:
+        values = {"repo_name": repo_name, "branch_name": feature_name}
+        expanded = _TEMPLATE_RE.sub(lambda m: values[m[1]] if m[1] else home, template)
+
+    path = Path(expanded)
+    if expanded.startswith("~"):
+        path = path.expanduser()
 
     if ".." in path.parts:
         raise ValueError(f"Worktree path contains path traversal component: {path}")
@@ -253,7 +335,7 @@ def _expand_worktree_path(template: str, repo_name: str, feature_name: str) -> P
     if not path.is_absolute():
         raise ValueError(f"Worktree path template must expand to an absolute path, got: {path}")
 
-    return path.resolve()
+    return path
 
 
 def start_worktree(feature_name: str) -> tuple[bool, str, Path | None]:
@@ -262,7 +344,8 @@ def start_worktree(feature_name: str) -> tuple[bool, str, Path | None]:
     Returns (success, message, worktree_path).
     """
     try:
-        repo_name = get_repo_name()
+        toplevel, main_dir = _get_repo_paths()
+        repo_name = toplevel.name
         path_template = CONFIG.get("worktree", {}).get("path_template")
 
         if path_template:
@@ -272,11 +355,7 @@ def start_worktree(feature_name: str) -> tuple[bool, str, Path | None]:
             except ValueError as e:
                 return False, str(e), None
         else:
-            main_wt = get_main_worktree()
-            if main_wt:
-                parent_dir = main_wt[0].parent
-            else:
-                parent_dir = Path.cwd().parent
+            parent_dir = (main_dir or Path.cwd()).parent
             worktree_dir = parent_dir / f"{repo_name}-{feature_name}"
 
         if worktree_dir.exists():
@@ -318,7 +397,7 @@ def get_finish_info(cwd: Path | None = None) -> tuple[bool, str, FinishInfo | No
     if current_wt is None or current_wt.is_main:
         return False, "Not in a feature worktree. Switch to a worktree first.", None
 
-    main_wt = get_main_worktree()
+    main_wt = _find_main(worktrees)
     if main_wt is None:
         return False, "Cannot find main worktree.", None
 
@@ -682,7 +761,7 @@ def cleanup_worktrees(
         needs_confirmation=True means the branch has changes or is unmerged.
     """
     worktrees = list_worktrees()
-    main_wt = get_main_worktree()
+    main_wt = _find_main(worktrees)
     main_dir = main_wt[0] if main_wt else None
     main_branch = main_wt[1] if main_wt else "main"
 
@@ -8,7 +8,7 @@ from claudechic.profiling import profile
 class Spinner(Static):
     """Animated spinner - all instances share a single timer for efficiency."""
 
-    FRAMES = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+    FRAMES = tuple("⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏")
     DEFAULT_CSS = """
     Spinner {
         width: 1;
@@ -17,47 +17,56 @@ class Spinner(Static):
     }
     """
 
-    # Class-level shared state
-    _instances: set["Spinner"] = set()
+    # Class-level shared state. Only spinners currently on screen are tracked
+    # (via Show/Hide), so hidden ones cost nothing per tick.
+    _visible: set["Spinner"] = set()
     _frame: int = 0
     _timer = None
 
     def __init__(self, text: str = "") -> None:
         self._text = f" {text}" if text else ""
+        # Pre-rendered frame strings so render() is a single tuple index
+        self._rendered_frames = tuple(f"{frame}{self._text}" for frame in self.FRAMES)
         super().__init__()
 
     def render(self) -> str:
         """Return current frame from shared counter."""
-        return f"{self.FRAMES[Spinner._frame]}{self._text}"
+        return self._rendered_frames[Spinner._frame]
 
-    def on_mount(self) -> None:
-        Spinner._instances.add(self)
-        # Start shared timer if this is the first spinner
+    def on_show(self) -> None:
+        Spinner._visible.add(self)
+        # Start shared timer if this is the first visible spinner
         # Use app.set_interval so timer survives widget unmount
         if Spinner._timer is None:
             Spinner._timer = self.app.set_interval(1 / 10, Spinner._tick_all)  # 10 FPS
 
+    def on_hide(self) -> None:
+        self._stop_animating()
+
     def on_unmount(self) -> None:
-        Spinner._instances.discard(self)
-        # Stop timer if no spinners left
-        if not Spinner._instances and Spinner._timer is not None:
+        # Hide may not be delivered to a widget that is being removed
+        self._stop_animating()
+
+    def _stop_animating(self) -> None:
+        Spinner._visible.discard(self)
+        # Stop timer if no spinners are visible
+        if not Spinner._visible and Spinner._timer is not None:
             Spinner._timer.stop()
             Spinner._timer = None
 
     @staticmethod
     @profile
     def _tick_all() -> None:
-        """Advance frame and refresh visible spinners only.
+        """Advance frame and refresh visible spinners.
 
         Uses private Textual APIs (_layout_cache, _set_dirty, _repaint_required)
         to avoid CSS recalculation on every frame. Falls back to refresh() if
         these internals change.
         """
-        Spinner._frame = (Spinner._frame + 1) % len(Spinner.FRAMES)
+        frame = Spinner._frame + 1
+        Spinner._frame = frame if frame < len(Spinner.FRAMES) else 0
         last_visible = None
-        for spinner in list(Spinner._instances):
-            if not spinner.region.width:  # Skip hidden spinners
-                continue
+        for spinner in Spinner._visible:
             last_visible = spinner
             try:
                 # Optimized: skip _rich_style_cache.clear() since spinner style never changes
@@ -438,25 +438,33 @@ class WorktreePrompt(BasePrompt):
         """
         super().__init__()
         self.worktrees = worktrees
-
-    def compose(self) -> ComposeResult:
-        yield Static("Worktrees", classes="prompt-title")
-        for i, (path, branch) in enumerate(self.worktrees):
-            classes = "prompt-option selected" if i == 0 else "prompt-option"
-            yield Static(
-                f"{i + 1}. {branch}", classes=classes, id=f"opt-{i}", markup=False
+        # (text, classes, id) per option, built once since worktrees don't change
+        self._options = [
+            (
+                f"{i + 1}. {branch}",
+                "prompt-option selected" if i == 0 else "prompt-option",
+                f"opt-{i}",
             )
+            for i, (_path, branch) in enumerate(worktrees)
+        ]
         # "New" option at the end
-        new_idx = len(self.worktrees)
+        new_idx = len(worktrees)
         classes = "prompt-option prompt-placeholder"
         if new_idx == 0:
             classes += " selected"
-        yield Static(
-            f"{new_idx + 1}. {self._text_option_placeholder()}",
-            classes=classes,
-            id=f"opt-{new_idx}",
+        self._options.append(
+            (
+                f"{new_idx + 1}. {self._text_option_placeholder()}",
+                classes,
+                f"opt-{new_idx}",
+            )
         )
 
+    def compose(self) -> ComposeResult:
+        yield Static("Worktrees", classes="prompt-title")
+        for text, classes, option_id in self._options:
+            yield Static(text, classes=classes, id=option_id, markup=False)
+
     def _total_options(self) -> int:
         return len(self.worktrees) + 1  # +1 for "New"
 
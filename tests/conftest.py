@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
+import time
+from collections.abc import Callable
 from typing import Any
 
 import pytest
@@ -24,6 +27,23 @@ async def wait_for_workers(app):
     await app.workers.wait_for_complete()
 
 
+async def wait_for(condition: Callable[[], bool], timeout: float = 2.0) -> None:
+    """Wait until condition() is true, for state that has no event to await.
+
+    Checks once before awaiting anything, then polls with exponential backoff
+    so quick conditions resolve promptly and slow ones don't hammer the loop.
+    """
+    if condition():
+        return
+    deadline = time.monotonic() + timeout
+    poll = 0.001
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Condition not met within {timeout}s")
+        await asyncio.sleep(poll)
+        poll = min(poll * 1.5, 0.05)
+
+
 async def submit_command(app, pilot, command: str):
     """Submit a command, handling autocomplete properly.
 
@@ -5,6 +5,7 @@ from pathlib import Path
 
 from claudechic import ChatApp
 from claudechic.widgets import ChatInput, TextAreaAutoComplete
+from tests.conftest import wait_for
 
 
 @pytest.mark.asyncio
@@ -51,10 +52,8 @@ async def test_slash_command_autocomplete(mock_sdk, tmp_path: Path):
 @pytest.mark.asyncio
 async def test_path_autocomplete(mock_sdk, tmp_path: Path):
     """Test file path autocomplete with @ trigger."""
-    import asyncio
-
     app = ChatApp()
-    async with app.run_test(size=(80, 24)) as pilot:
+    async with app.run_test(size=(80, 24)):
         autocomplete = app.query_one(TextAreaAutoComplete)
         # Override app's file index to use test files
         assert app.file_index is not None
@@ -64,21 +63,15 @@ async def test_path_autocomplete(mock_sdk, tmp_path: Path):
 
         # Type @ to start path completion
         input_widget.text = "@"
-        # Wait for debounce (150ms) + buffer
-        await asyncio.sleep(0.2)
-        await pilot.pause()
+        # Wait out the debounce (150ms)
+        await wait_for(lambda: autocomplete.option_list.option_count == 3)
 
         # Should show files from index
         assert autocomplete.styles.display == "block"
-        assert autocomplete.option_list.option_count == 3
 
         # Filter to just .txt files
         input_widget.text = "@file"
-        # Wait for debounce
-        await asyncio.sleep(0.2)
-        await pilot.pause()
-
-        assert autocomplete.option_list.option_count == 2
+        await wait_for(lambda: autocomplete.option_list.option_count == 2)
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,277 @@
+"""Tests for session compaction."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from claudechic.compact import compact_session
+
+SESSION_ID = "test-session"
+
+
+def _tool_use(tool_id: str, name: str, inp: dict) -> dict:
+    return {
+        "type": "assistant",
+        "message": {
+            "content": [{"type": "tool_use", "id": tool_id, "name": name, "input": inp}]
+        },
+    }
+
+
+def _tool_result(tool_id: str, content: str) -> dict:
+    return {
+        "type": "user",
+        "message": {
+            "content": [
+                {"type": "tool_result", "tool_use_id": tool_id, "content": content}
+            ]
+        },
+        "toolUseResult": content,
+    }
+
+
+@pytest.fixture
+def sessions_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "claudechic.compact.get_project_sessions_dir", lambda cwd=None: tmp_path
+    )
+    return tmp_path
+
+
+def _write_session(sessions_dir, messages: list[dict]):
+    path = sessions_dir / f"{SESSION_ID}.jsonl"
+    path.write_text("".join(json.dumps(m) + "\n" for m in messages))
+    return path
+
+
+def _read_session(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines() if line]
+
+
+def _bash_session(n: int, output_size: int = 5000) -> list[dict]:
+    """A user prompt followed by n Bash calls with large outputs."""
+    messages: list[dict] = [
+        {"type": "user", "message": {"content": "run the things"}},
+        {"type": "assistant", "message": {"content": [{"type": "text", "text": "ok"}]}},
+    ]
+    for i in range(n):
+        messages.append(_tool_use(f"bash-{i}", "Bash", {"command": f"echo {i}"}))
+        messages.append(_tool_result(f"bash-{i}", "x" * output_size))
+    return messages
+
+
+def test_missing_session_file(sessions_dir):
+    result = compact_session("nope")
+    assert "error" in result
+
+
+def test_compacts_old_large_results_and_keeps_recent(sessions_dir):
+    path = _write_session(sessions_dir, _bash_session(8))
+
+    stats = compact_session(SESSION_ID, keep_last_n=5)
+
+    assert stats["compacted_results"] == 3
+    assert stats["compacted_inputs"] == 0
+    assert stats["tokens_saved"] > 0
+    assert stats["after_total"] < stats["before_total"]
+
+    messages = _read_session(path)
+    results = {
+        m["message"]["content"][0]["tool_use_id"]: m
+        for m in messages
+        if m["type"] == "user" and isinstance(m["message"]["content"], list)
+    }
+    for i in range(3):
+        assert results[f"bash-{i}"]["message"]["content"][0]["content"] == (
+            "[output compacted]"
+        )
+        assert results[f"bash-{i}"]["toolUseResult"] == "[output compacted]"
+    for i in range(3, 8):
+        assert results[f"bash-{i}"]["message"]["content"][0]["content"] == "x" * 5000
+
+    backup = sessions_dir / f"{SESSION_ID}.jsonl.bak"
+    assert stats["backup"] == str(backup)
+    assert len(_read_session(backup)) == len(messages)
+
+
+def test_compacts_old_large_inputs(sessions_dir):
+    messages = [
+        _tool_use(f"write-{i}", "Write", {"file_path": "/f.py", "content": "y" * 3000})
+        for i in range(7)
+    ]
+    path = _write_session(sessions_dir, messages)
+
+    stats = compact_session(SESSION_ID, keep_last_n=5)
+
+    assert stats["compacted_inputs"] == 2
+    blocks = [m["message"]["content"][0] for m in _read_session(path)]
+    assert blocks[0]["input"]["_compacted"] is True
+    assert blocks[0]["input"]["_original_size"] > 3000
+    assert blocks[6]["input"]["content"] == "y" * 3000
+
+
+def test_lone_surrogates_from_truncated_output(sessions_dir):
+    # Node leaves a lone high surrogate when output is cut mid-emoji
+    messages = _bash_session(8)
+    for m in messages:
+        if m["type"] == "user" and isinstance(m["message"]["content"], list):
+            m["message"]["content"][0]["content"] += "\ud83d"
+    path = _write_session(sessions_dir, messages)
+
+    stats = compact_session(SESSION_ID, keep_last_n=5)
+
+    assert stats["compacted_results"] == 3
+    contents = [
+        m["message"]["content"][0]["content"]
+        for m in _read_session(path)
+        if m["type"] == "user" and isinstance(m["message"]["content"], list)
+    ]
+    assert contents[:3] == ["[output compacted]"] * 3
+    assert contents[3:] == ["x" * 5000 + "\ud83d"] * 5
+
+
+def test_rewrite_preserves_values_orjson_cannot_round_trip(sessions_dir):
+    big = 2**70
+    messages = _bash_session(8)
+    messages[3]["bigCounter"] = big  # First Bash result, gets compacted
+    messages[-1]["bigCounter"] = big  # Last Bash result, left untouched
+    path = _write_session(sessions_dir, messages)
+    untouched_line = path.read_bytes().splitlines(keepends=True)[-1]
+
+    compact_session(SESSION_ID, keep_last_n=5)
+
+    rewritten = _read_session(path)
+    assert rewritten[3]["message"]["content"][0]["content"] == "[output compacted]"
+    assert rewritten[3]["bigCounter"] == big
+    assert path.read_bytes().splitlines(keepends=True)[-1] == untouched_line
+
+
+def test_replaces_existing_backup(sessions_dir):
+    path = _write_session(sessions_dir, _bash_session(8))
+    original = path.read_bytes()
+    backup = sessions_dir / f"{SESSION_ID}.jsonl.bak"
+    backup.write_text("stale\n")
+
+    compact_session(SESSION_ID, keep_last_n=5)
+
+    assert backup.read_bytes() == original
+    assert path.read_bytes() != original
+    assert sorted(p.name for p in sessions_dir.iterdir()) == [
+        f"{SESSION_ID}.jsonl",
+        f"{SESSION_ID}.jsonl.bak",
+    ]
+
+
+def test_backup_falls_back_to_copy_without_hard_links(sessions_dir, monkeypatch):
+    path = _write_session(sessions_dir, _bash_session(8))
+    original = path.read_bytes()
+
+    def no_link(src, dst):
+        raise OSError("hard links not supported")
+
+    monkeypatch.setattr("claudechic.compact.os.link", no_link)
+    stats = compact_session(SESSION_ID, keep_last_n=5)
+
+    assert Path(stats["backup"]).read_bytes() == original
+
+
+def test_failed_backup_keeps_previous_backup(sessions_dir, monkeypatch):
+    path = _write_session(sessions_dir, _bash_session(8))
+    original = path.read_bytes()
+    backup = sessions_dir / f"{SESSION_ID}.jsonl.bak"
+    backup.write_text("previous\n")
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("claudechic.compact.os.link", fail)
+    monkeypatch.setattr("claudechic.compact.shutil.copyfile", fail)
+    with pytest.raises(OSError, match="disk full"):
+        compact_session(SESSION_ID, keep_last_n=5)
+
+    assert backup.read_text() == "previous\n"
+    assert path.read_bytes() == original
+    assert sorted(p.name for p in sessions_dir.iterdir()) == [
+        f"{SESSION_ID}.jsonl",
+        f"{SESSION_ID}.jsonl.bak",
+    ]
+
+
+def test_backup_disabled(sessions_dir):
+    path = _write_session(sessions_dir, _bash_session(8))
+    original = path.read_bytes()
+
+    stats = compact_session(SESSION_ID, keep_last_n=5, backup=False)
+
+    assert stats["compacted_results"] == 3
+    assert "backup" not in stats
+    assert path.read_bytes() != original
+    assert [p.name for p in sessions_dir.iterdir()] == [f"{SESSION_ID}.jsonl"]
+
+
+def test_nothing_to_compact_skips_rewrite(sessions_dir):
+    path = _write_session(sessions_dir, _bash_session(3))
+    original = path.read_bytes()
+
+    stats = compact_session(SESSION_ID, keep_last_n=5)
+
+    assert stats["compacted_results"] == 0
+    assert stats["tokens_saved"] == 0
+    assert stats["after_breakdown"] == stats["before_breakdown"]
+    assert "backup" not in stats
+    assert path.read_bytes() == original
+    assert not (sessions_dir / f"{SESSION_ID}.jsonl.bak").exists()
+
+
+def test_dry_run_leaves_file_untouched(sessions_dir):
+    path = _write_session(sessions_dir, _bash_session(8))
+    original = path.read_bytes()
+
+    stats = compact_session(SESSION_ID, keep_last_n=5, dry_run=True)
+
+    assert stats["dry_run"] is True
+    assert stats["compacted_results"] == 3
+    assert path.read_bytes() == original
+    assert not (sessions_dir / f"{SESSION_ID}.jsonl.bak").exists()
+
+
+def test_read_preserved_unless_later_write(sessions_dir):
+    messages = [
+        _tool_use("read-kept", "Read", {"file_path": "/src/a.py"}),
+        _tool_result("read-kept", "a" * 5000),
+        _tool_use("read-edited", "Read", {"file_path": "/src/b.py"}),
+        _tool_result("read-edited", "b" * 5000),
+        _tool_use("edit-b", "Edit", {"file_path": "/src/b.py"}),
+        _tool_result("edit-b", "ok"),
+        _tool_use("read-claude", "Read", {"file_path": "/src/CLAUDE.md"}),
+        _tool_result("read-claude", "c" * 5000),
+        _tool_use("edit-claude", "Edit", {"file_path": "/src/CLAUDE.md"}),
+        _tool_result("edit-claude", "ok"),
+    ]
+    path = _write_session(sessions_dir, messages)
+
+    stats = compact_session(SESSION_ID, keep_last_n=0)
+
+    assert stats["compacted_results"] == 1
+    contents = {
+        m["message"]["content"][0]["tool_use_id"]: m["message"]["content"][0]["content"]
+        for m in _read_session(path)
+        if m["type"] == "user"
+    }
+    assert contents["read-kept"] == "a" * 5000
+    assert contents["read-edited"] == "[file content compacted]"
+    assert contents["read-claude"] == "c" * 5000
+
+
+def test_breakdown_categories(sessions_dir):
+    _write_session(sessions_dir, _bash_session(8))
+
+    stats = compact_session(SESSION_ID, keep_last_n=5, dry_run=True)
+
+    before = stats["before_breakdown"]
+    assert set(before) == {"assistant_text", "tool_inputs", "tool_results", "user_text"}
+    assert all(type(v) is int for v in before.values())
+    assert before["tool_results"] == 8 * 5000 // 4
+    assert stats["before_total"] == sum(before.values())
+    assert stats["after_breakdown"]["tool_results"] < before["tool_results"]
@@ -17,6 +17,7 @@ from claudechic.widgets import (
     BackgroundProcess,
     ModelPrompt,
     StatusFooter,
+    WorktreePrompt,
     ContextBar,
 )
 from claudechic.widgets.content.todo import TodoItem
@@ -236,6 +237,23 @@ async def test_model_prompt_escape():
     assert result is None
 
 
+@pytest.mark.asyncio
+async def test_worktree_prompt_options():
+    """WorktreePrompt lists worktrees followed by the "New" option."""
+    worktrees = [("/repo-a", "feature-a"), ("/repo-b", "[b]")]
+    app = WidgetTestApp(lambda: WorktreePrompt(worktrees))
+    async with app.run_test() as pilot:
+        prompt = app.query_one(WorktreePrompt)
+        options = [str(opt.render()) for opt in prompt.query(".prompt-option")]
+        assert options == ["1. feature-a", "2. [b]", "3. Enter name..."]
+        assert prompt.query_one("#opt-0").has_class("selected")
+
+        await pilot.press("2")
+        result = await prompt.wait()
+
+    assert result == ("switch", "/repo-b")
+
+
 @pytest.mark.asyncio
 async def test_question_prompt_multi_question():
     """Handles multiple questions."""
@@ -448,6 +466,29 @@ async def test_thinking_indicator_animates():
         assert indicator._frame != initial_frame or indicator._frame == 0  # May wrap
 
 
+@pytest.mark.asyncio
+async def test_hidden_spinner_stops_ticking():
+    """Hidden spinners leave the tick set; the shared timer stops with none shown."""
+    from claudechic.widgets import Spinner
+
+    app = WidgetTestApp(ThinkingIndicator)
+    async with app.run_test() as pilot:
+        indicator = app.query_one(ThinkingIndicator)
+        await pilot.pause()
+        assert indicator in Spinner._visible
+        assert Spinner._timer is not None
+
+        indicator.display = False
+        await pilot.pause()
+        assert indicator not in Spinner._visible
+        assert Spinner._timer is None
+
+        indicator.display = True
+        await pilot.pause()
+        assert indicator in Spinner._visible
+        assert Spinner._timer is not None
+
+
 @pytest.mark.asyncio
 async def test_history_search_filters():
     """HistorySearch filters history and cycles through matches."""
@@ -1,28 +1,16 @@
 """Tests for worktree path template expansion."""
 
+import subprocess
 from pathlib import Path
-from unittest.mock import patch
+from types import SimpleNamespace
+from unittest.mock import Mock
 
 import pytest
 
 from claudechic.features.worktree.git import _expand_worktree_path, start_worktree
 
-
-@pytest.fixture
-def mock_worktree_deps():
-    """Mock all external dependencies for start_worktree tests."""
-    with (
-        patch("claudechic.features.worktree.git.CONFIG") as mock_config,
-        patch("claudechic.features.worktree.git.get_main_worktree") as mock_get_main,
-        patch("claudechic.features.worktree.git.get_repo_name") as mock_get_repo,
-        patch("claudechic.features.worktree.git.subprocess.run") as mock_run,
-    ):
-        yield {
-            "config": mock_config,
-            "get_main": mock_get_main,
-            "get_repo": mock_get_repo,
-            "run": mock_run,
-        }
+# Resolved once; the expected paths below all hang off the home directory
+_HOME = Path.home()
 
 
 class TestWorktreePathTemplate:
@@ -33,14 +21,15 @@ class TestWorktreePathTemplate:
         [
             ("/tmp/worktrees/${repo_name}", Path("/tmp/worktrees/my-repo")),
             ("/tmp/worktrees/${branch_name}", Path("/tmp/worktrees/test-feature")),
-            ("$HOME/worktrees/test", Path.home() / "worktrees" / "test"),
-            ("~/worktrees/test", Path.home() / "worktrees" / "test"),
+            ("$HOME/worktrees/test", Path(f"{_HOME}/worktrees/test")),
+            ("~/worktrees/test", Path(f"{_HOME}/worktrees/test")),
+            ("/tmp/worktrees/plain", Path("/tmp/worktrees/plain")),
         ],
     )
     def test_template_variable_expansion(self, template, expected):
         """Test template variable expansion for various variables."""
         result = _expand_worktree_path(template, "my-repo", "test-feature")
-        assert result == expected.resolve()
+        assert result == expected
 
     def test_expand_template_combined(self):
         """Test combined template with multiple variables."""
@@ -49,9 +38,18 @@ class TestWorktreePathTemplate:
             repo_name="my-repo",
             feature_name="test-feature",
         )
-        expected = Path.home() / "code" / "worktrees" / "my-repo" / "test-feature"
+        expected = Path(f"{_HOME}/code/worktrees/my-repo/test-feature")
         assert result == expected
 
+    def test_expansion_follows_home_changes(self, tmp_path, monkeypatch):
+        """Test that cached expansions still pick up a changed home directory."""
+        _expand_worktree_path("$HOME/wt/${branch_name}", "my-repo", "test-feature")
+        monkeypatch.setenv("HOME", str(tmp_path))
+        result = _expand_worktree_path(
+            "$HOME/wt/${branch_name}", "my-repo", "test-feature"
+        )
+        assert result == Path(f"{tmp_path}/wt/test-feature")
+
     def test_expand_template_with_spaces_in_names(self):
         """Test handling of spaces in repo/branch names."""
         result = _expand_worktree_path(
@@ -59,91 +57,139 @@ class TestWorktreePathTemplate:
             repo_name="my repo",
             feature_name="test feature",
         )
-        assert result == Path("/tmp/my repo/test feature").resolve()
+        assert result == Path("/tmp/my repo/test feature")
+
+    def test_normalizes_without_resolving_symlinks(self, tmp_path):
+        """Test that the path is normalized lexically, keeping symlinks as written."""
+        (tmp_path / "real").mkdir()
+        (tmp_path / "link").symlink_to(tmp_path / "real")
+        result = _expand_worktree_path(
+            f"{tmp_path}//link/./${{branch_name}}", "my-repo", "test-feature"
+        )
+        assert result == Path(f"{tmp_path}/link/test-feature")
+
+    def test_substituted_names_are_not_expanded(self):
+        """Test that a name containing a template variable is used literally."""
+        result = _expand_worktree_path(
+            "/tmp/${repo_name}/${branch_name}",
+            repo_name="my-repo",
+            feature_name="$HOME-notes",
+        )
+        assert result == Path("/tmp/my-repo/$HOME-notes")
+
+    def test_allows_slash_in_feature_name(self):
+        """Test that nested branch names like feature/x are allowed."""
+        result = _expand_worktree_path(
+            "/tmp/${repo_name}/${branch_name}",
+            repo_name="my-repo",
+            feature_name="feature/x",
+        )
+        assert result == Path("/tmp/my-repo/feature/x")
 
-    def test_rejects_path_traversal_in_feature_name(self):
-        """Test that path traversal in feature name is rejected."""
-        with pytest.raises(ValueError, match="path traversal"):
-            _expand_worktree_path(
+    @pytest.mark.parametrize(
+        "template,repo_name,feature_name,error",
+        [
+            pytest.param(
+                "/tmp/${repo_name}/${branch_name}",
+                "my-repo",
+                "../../etc/passwd",
+                "path traversal",
+                id="traversal-in-feature-name",
+            ),
+            pytest.param(
                 "/tmp/${repo_name}/${branch_name}",
-                repo_name="my-repo",
-                feature_name="../../etc/passwd",
-            )
-
-    def test_rejects_path_traversal_in_repo_name(self):
-        """Test that path traversal in repo name is rejected."""
-        with pytest.raises(ValueError, match="path traversal"):
-            _expand_worktree_path(
+                "../../../etc",
+                "test-feature",
+                "path traversal",
+                id="traversal-in-repo-name",
+            ),
+            pytest.param(
                 "/tmp/${repo_name}/${branch_name}",
-                repo_name="../../../etc",
-                feature_name="test-feature",
-            )
-
-    def test_rejects_relative_path_template(self):
-        """Test that relative path templates are rejected."""
-        with pytest.raises(ValueError, match="absolute path"):
-            _expand_worktree_path(
+                "my-repo",
+                "test\x00feature",
+                "null byte",
+                id="null-byte-in-feature-name",
+            ),
+            pytest.param(
                 "relative/path/${branch_name}",
-                repo_name="my-repo",
-                feature_name="test-feature",
-            )
-
-    def test_rejects_path_traversal_in_template(self):
-        """Test that path traversal in template itself is rejected."""
-        with pytest.raises(ValueError, match="path traversal"):
-            _expand_worktree_path(
+                "my-repo",
+                "test-feature",
+                "absolute path",
+                id="relative-template",
+            ),
+            pytest.param(
                 "/tmp/../../../etc/${branch_name}",
-                repo_name="my-repo",
-                feature_name="test-feature",
-            )
-
-    def test_rejects_empty_repo_name(self):
-        """Test that empty repository name is rejected."""
-        with pytest.raises(ValueError, match="Repository name cannot be empty"):
-            _expand_worktree_path(
+                "my-repo",
+                "test-feature",
+                "path traversal",
+                id="traversal-in-template",
+            ),
+            pytest.param(
                 "/tmp/${repo_name}/${branch_name}",
-                repo_name="",
-                feature_name="test-feature",
-            )
-
-    def test_rejects_empty_feature_name(self):
-        """Test that empty feature name is rejected."""
-        with pytest.raises(ValueError, match="Feature name cannot be empty"):
-            _expand_worktree_path(
+                "",
+                "test-feature",
+                "Repository name cannot be empty",
+                id="empty-repo-name",
+            ),
+            pytest.param(
                 "/tmp/${repo_name}/${branch_name}",
-                repo_name="my-repo",
-                feature_name="",
-            )
-
-    def test_rejects_whitespace_only_repo_name(self):
-        """Test that whitespace-only repository name is rejected."""
-        with pytest.raises(ValueError, match="Repository name cannot be empty"):
-            _expand_worktree_path(
+                "my-repo",
+                "",
+                "Feature name cannot be empty",
+                id="empty-feature-name",
+            ),
+            pytest.param(
                 "/tmp/${repo_name}/${branch_name}",
-                repo_name="   ",
-                feature_name="test-feature",
-            )
+                "   ",
+                "test-feature",
+                "Repository name cannot be empty",
+                id="whitespace-only-repo-name",
+            ),
+        ],
+    )
+    def test_rejects_invalid_input(self, template, repo_name, feature_name, error):
+        """Test that unsafe names and templates are rejected."""
+        with pytest.raises(ValueError, match=error):
+            _expand_worktree_path(template, repo_name, feature_name)
 
 
 class TestStartWorktreeWithConfig:
     """Test start_worktree() with path_template config."""
 
-    def test_uses_custom_template_when_configured(self, mock_worktree_deps, tmp_path):
+    @pytest.fixture(autouse=True)
+    def mocks(self, monkeypatch):
+        """Mock all external dependencies for start_worktree tests."""
+        mocks = SimpleNamespace(config=Mock(), repo_paths=Mock(), run=Mock())
+        monkeypatch.setattr("claudechic.features.worktree.git.CONFIG", mocks.config)
+        monkeypatch.setattr(
+            "claudechic.features.worktree.git._get_repo_paths", mocks.repo_paths
+        )
+        # Swap the module's subprocess reference, keeping the real exception type
+        monkeypatch.setattr(
+            "claudechic.features.worktree.git.subprocess",
+            SimpleNamespace(
+                run=mocks.run, CalledProcessError=subprocess.CalledProcessError
+            ),
+        )
+        return mocks
+
+    def test_uses_custom_template_when_configured(self, mocks, tmp_path):
         """Test that custom path template is used when configured."""
-        mocks = mock_worktree_deps
-        mocks["get_repo"].return_value = "test-repo"
-        mocks["get_main"].return_value = (Path("/original/test-repo"), "main")
+        mocks.repo_paths.return_value = (
+            Path("/original/test-repo"),
+            Path("/original/test-repo"),
+        )
 
         template = f"{tmp_path}/worktrees/${{repo_name}}/${{branch_name}}"
-        mocks["config"].get.return_value = {"path_template": template}
+        mocks.config.get.return_value = {"path_template": template}
 
         success, message, path = start_worktree("test-feature")
 
-        expected_path = (tmp_path / "worktrees" / "test-repo" / "test-feature").resolve()
+        expected_path = Path(f"{tmp_path}/worktrees/test-repo/test-feature")
         assert success
         assert path == expected_path
         assert "Created worktree at" in message
-        mocks["run"].assert_called_once()
+        mocks.run.assert_called_once()
 
     @pytest.mark.parametrize(
         "config_return",
@@ -152,33 +198,32 @@ class TestStartWorktreeWithConfig:
             {},
         ],
     )
-    def test_uses_sibling_behavior_when_no_template(self, mock_worktree_deps, config_return):
+    def test_uses_sibling_behavior_when_no_template(self, mocks, config_return):
         """Test that sibling behavior is preserved when path_template is null or missing."""
-        mocks = mock_worktree_deps
-        mocks["get_repo"].return_value = "test-repo"
         main_worktree_path = Path("/original/test-repo")
-        mocks["get_main"].return_value = (main_worktree_path, "main")
-        mocks["config"].get.return_value = config_return
+        mocks.repo_paths.return_value = (main_worktree_path, main_worktree_path)
+        mocks.config.get.return_value = config_return
 
         success, message, path = start_worktree("test-feature")
 
         expected_path = Path("/original/test-repo-test-feature")
         assert success, f"Expected success but got failure: {message}"
         assert path == expected_path
-        mocks["run"].assert_called_once()
+        mocks.run.assert_called_once()
 
-    def test_creates_parent_directories_for_custom_path(self, mock_worktree_deps, tmp_path):
+    def test_creates_parent_directories_for_custom_path(self, mocks, tmp_path):
         """Test that parent directories are created for custom paths."""
-        mocks = mock_worktree_deps
-        mocks["get_repo"].return_value = "test-repo"
-        mocks["get_main"].return_value = (Path("/original/test-repo"), "main")
+        mocks.repo_paths.return_value = (
+            Path("/original/test-repo"),
+            Path("/original/test-repo"),
+        )
 
         template = f"{tmp_path}/deep/nested/path/${{repo_name}}/${{branch_name}}"
-        mocks["config"].get.return_value = {"path_template": template}
+        mocks.config.get.return_value = {"path_template": template}
 
         success, message, path = start_worktree("test-feature")
 
-        expected_path = (tmp_path / "deep" / "nested" / "path" / "test-repo" / "test-feature").resolve()
+        expected_path = Path(f"{tmp_path}/deep/nested/path/test-repo/test-feature")
         assert success
         assert path == expected_path
         assert expected_path.parent.exists()
@@ -0,0 +1,145 @@
+"""Tests for worktree git helpers, run against real repositories."""
+
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from claudechic.features.worktree.git import (
+    FinishInfo,
+    WorktreeInfo,
+    _get_repo_paths,
+    _parse_worktree_porcelain,
+    finish_cleanup,
+    get_main_worktree,
+    list_worktrees,
+    list_worktrees_async,
+)
+
+
+def _git(*args: str, cwd: Path | None = None) -> None:
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def git_repo(tmp_path, monkeypatch):
+    """Create a real git repo with one commit and chdir into it."""
+    for var in ("GIT_AUTHOR", "GIT_COMMITTER"):
+        monkeypatch.setenv(f"{var}_NAME", "test")
+        monkeypatch.setenv(f"{var}_EMAIL", "test@example.com")
+    repo = tmp_path / "my-repo"
+    repo.mkdir()
+    _git("init", "-q", "-b", "main", cwd=repo)
+    _git("commit", "-q", "--allow-empty", "-m", "init", cwd=repo)
+    monkeypatch.chdir(repo)
+    return repo.resolve()
+
+
+class TestGetRepoPaths:
+    """Test _get_repo_paths() against a real repository."""
+
+    def test_main_worktree(self, git_repo):
+        assert _get_repo_paths() == (git_repo, git_repo)
+
+    def test_paths_are_absolute_from_subdirectory(self, git_repo, monkeypatch):
+        subdir = git_repo / "src" / "pkg"
+        subdir.mkdir(parents=True)
+        monkeypatch.chdir(subdir)
+        toplevel, main_dir = _get_repo_paths()
+        assert toplevel.is_absolute()
+        assert (toplevel, main_dir) == (git_repo, git_repo)
+
+    def test_linked_worktree(self, git_repo, monkeypatch):
+        linked = git_repo.parent / "my-repo-feature"
+        _git("worktree", "add", "-q", "-b", "feature", str(linked))
+        monkeypatch.chdir(linked)
+        assert _get_repo_paths() == (linked, git_repo)
+
+    def test_cached_per_cwd(self, git_repo):
+        first = _get_repo_paths()
+        with patch("claudechic.features.worktree.git.subprocess.run") as mock_run:
+            assert _get_repo_paths() == first
+        mock_run.assert_not_called()
+
+
+class TestListWorktrees:
+    """Test `git worktree list --porcelain` parsing."""
+
+    def test_parses_records_and_skips_detached(self):
+        output = (
+            b"worktree /repo\nHEAD abc\nbranch refs/heads/main\n\n"
+            b"worktree /repo-detached\nHEAD def\ndetached\n\n"
+            b"worktree /repo-feature\nHEAD 123\nbranch refs/heads/feature/x"
+        )
+        worktrees = _parse_worktree_porcelain(output.splitlines(keepends=True))
+        assert worktrees == [
+            WorktreeInfo(Path("/repo"), "main", is_main=True),
+            WorktreeInfo(Path("/repo-feature"), "feature/x", is_main=False),
+        ]
+
+    def test_bare_repo_has_no_main(self):
+        output = (
+            b"worktree /repo.git\nbare\n\n"
+            b"worktree /repo-feature\nHEAD 123\nbranch refs/heads/feature\n\n"
+        )
+        worktrees = _parse_worktree_porcelain(output.splitlines(keepends=True))
+        assert worktrees == [
+            WorktreeInfo(Path("/repo-feature"), "feature", is_main=False),
+        ]
+
+    def test_real_repo(self, git_repo):
+        linked = git_repo.parent / "my-repo-feature"
+        _git("worktree", "add", "-q", "-b", "feature", str(linked))
+        assert list_worktrees() == [
+            WorktreeInfo(git_repo, "main", is_main=True),
+            WorktreeInfo(linked, "feature", is_main=False),
+        ]
+
+    def test_raises_outside_repo(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        with pytest.raises(subprocess.CalledProcessError):
+            list_worktrees()
+
+    async def test_async_matches_sync(self, git_repo):
+        _git("worktree", "add", "-q", "-b", "feature", str(git_repo.parent / "wt"))
+        assert await list_worktrees_async() == list_worktrees()
+
+
+class TestFinishCleanup:
+    """Test finish_cleanup() against a real repository."""
+
+    @pytest.fixture
+    def info(self, git_repo):
+        linked = git_repo.parent / "my-repo-feature"
+        _git("worktree", "add", "-q", "-b", "feature", str(linked))
+        return FinishInfo("feature", "main", linked, git_repo)
+
+    def test_removes_merged_worktree_and_branch(self, info):
+        assert finish_cleanup(info) == (True, "")
+        assert not info.worktree_dir.exists()
+        assert [wt.branch for wt in list_worktrees()] == ["main"]
+
+    def test_refuses_unmerged_branch(self, info):
+        _git("commit", "-q", "--allow-empty", "-m", "wip", cwd=info.worktree_dir)
+        success, message = finish_cleanup(info)
+        assert not success
+        assert message == "Branch 'feature' is not merged into 'main'"
+        assert info.worktree_dir.exists()
+
+    def test_reports_worktree_remove_failure(self, info):
+        (info.worktree_dir / "untracked.txt").write_text("work")
+        success, message = finish_cleanup(info)
+        assert not success
+        assert "untracked" in message
+        assert info.worktree_dir.exists()
+
+
+class TestGetMainWorktree:
+    """Test get_main_worktree() against a real repository."""
+
+    def test_returns_main_from_linked_worktree(self, git_repo, monkeypatch):
+        linked = git_repo.parent / "my-repo-feature"
+        _git("worktree", "add", "-q", "-b", "feature", str(linked))
+        monkeypatch.chdir(linked)
+        assert get_main_worktree() == (git_repo, "main")